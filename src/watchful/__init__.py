@@ -49,9 +49,12 @@ from .client import (
     export,
     export_preview,
     export_project,
+    export_project_to_path,
     is_utf8,
     create_dataset,
+    create_dataset_stream,
     label_single,
+    label_batch,
     config_set,
     config,
     set_hub_url,
@@ -74,6 +77,7 @@ from .attributes import (
     base64,
     base64str,
     contig_spans,
+    contig_spans_base64str,
     writer,
     spacy_atterize,
     spacy_atterize_fn,
@@ -84,6 +88,8 @@ from .attributes import (
     enrich_row,
     adjust_span_offsets_from_char_to_byte,
     init_args,
+    get_n_processes,
+    count_rows,
     enrich,
     enrich_by_row,
     enrich_by_col,
@@ -10,9 +10,11 @@ import json
 import os
 import pprint
 import re
+from functools import lru_cache
 from heapq import merge
 from multiprocessing import Pool
-from typing import Callable, Dict, List, Optional, Tuple
+from operator import itemgetter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 import psutil
 import warnings
 from watchful import client, enricher
@@ -29,6 +31,10 @@ IS_MULTIPROC = False
 MULTIPROC_CHUNKSIZE = None
 ENRICHMENT_ARGS = None
 ATTR_WRITER = None
+COUNT_ROWS_BUFSIZE = 1 << 20
+# A carriage return that is not followed by a newline, which ``csv`` also
+# takes as the end of a row.
+LONE_CR_PATTERN = re.compile(rb"\r(?!\n)")
 
 
 # Constants for encoding spans into compact strings. Do not edit them.
@@ -110,7 +116,7 @@ def base64(num: int) -> str:
     return ret[::-1]
 
 
-def base64str(list_of_integers: List[int]) -> str:
+def base64str(list_of_integers: Iterable[int]) -> str:
     """
     This function takes in a list of integers and returns its encoded string
     value with substrings representing those integers in base64.
@@ -140,8 +146,8 @@ def base64str(list_of_integers: List[int]) -> str:
     contain comma (",") as it is used as a delimiter to concatenate all of the
     strings.
 
-    :param list_of_integers: The list of integers.
-    :type list_of_integers: List[int]
+    :param list_of_integers: The list, or any iterable, of integers.
+    :type list_of_integers: Iterable[int]
     :return: The encoded string value.
     :rtype: str
     """
@@ -158,19 +164,14 @@ def base64str(list_of_integers: List[int]) -> str:
             if compress_idx < COMPRESSED_LEN:  # compression limit
                 ret.append(f'{COMPRESSED[compress_idx]}{"".join(buf)}')
             else:
-                for x in buf:
-                    ret.append(x)
-
-    def push_buf(buf, s):
-        if len(buf) == 0 or len(s) == len(buf[0]):
-            buf.append(s)
-        else:
-            flush_buf()
-            buf = push_buf([], s)
-        return buf
+                ret.extend(buf)
+        buf.clear()
 
     for x in list_of_integers:
-        buf = push_buf(buf, base64(x))
+        s = base64(x)
+        if buf and len(s) != len(buf[0]):
+            flush_buf()
+        buf.append(s)
     flush_buf()
 
     return ",".join(ret)
@@ -198,6 +199,28 @@ def contig_spans(spans: List[Tuple[int, int]]) -> List[int]:
     return contig
 
 
+def contig_spans_base64str(spans: List[Tuple[int, int]]) -> str:
+    """
+    This function is equivalent to ``base64str(contig_spans(spans))``, but
+    encodes the contiguous spans as they are computed, in a single pass and
+    without building the intermediate list.
+
+    :param spans: The list of spans.
+    :type spans: List[Tuple[int, int]]
+    :return: The encoded string value of the contiguous spans.
+    :rtype: str
+    """
+
+    def __iter_contig(spans):
+        offset = 0
+        for a, b in spans:
+            yield a - offset
+            yield b - a
+            offset = b
+
+    return base64str(__iter_contig(spans))
+
+
 def writer(output: io.TextIOWrapper, n_rows: int, n_cols: int) -> Callable:
     """
     This function takes in the output file object and the number of rows and
@@ -238,9 +261,13 @@ def writer(output: io.TextIOWrapper, n_rows: int, n_cols: int) -> Callable:
     attrs = {}
     values = {}
 
-    def write_jsonl(obj):
-        json.dump(obj, output, separators=(",", ":"))
-        output.write("\n")
+    # ``json.dump`` makes one write per encoded token, whereas ``encode`` builds
+    # the whole string in the C encoder, so every line is encoded first and all
+    # the lines for a cell are written at once.
+    encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def write_jsonl(objs):
+        output.write("".join([f"{encode(obj)}\n" for obj in objs]))
 
     def write(cell_data):
         new_attrs = []
@@ -255,63 +282,61 @@ def writer(output: io.TextIOWrapper, n_rows: int, n_cols: int) -> Callable:
             attr_vals = span_data[1]
             name = span_data[2] if len(span_data) == 3 else None
 
-            # Gather the new attributes and values
-            # Gather and create new mappings at the same time. Duh :)
+            # Gather the new attributes and values, and create the vector for
+            # the current cell at the same time. Existing attributes and values
+            # take a single dictionary lookup each.
+            span_val = []
+            if name is not None:
+                span_val.append(name)
             for attr, vals in attr_vals.items():
-                if attr not in attrs:
-                    attrs[attr] = len(attrs) + 1
+                attr_id = attrs.get(attr)
+                if attr_id is None:
+                    attr_id = attrs[attr] = len(attrs) + 1
                     values[attr] = {}
                     new_attrs.append(attr)
+                attr_values = values[attr]
+
+                val_ids = []
                 for val in vals:
+                    if val is None:
+                        val_ids.append(0)
+                        continue
                     if isinstance(val, (int, float, bool)):
                         val = str(val)
-                    elif val is None:
-                        pass
                     elif val == "" or not isinstance(val, str):
                         raise ValueError(
                             "Attribute value needs to be either a non-empty "
                             f"string, int, float, bool or None; got {val} "
                             "instead."
                         )
-                    if val and val not in values[attr]:
-                        values[attr][val] = len(values[attr]) + 1
-                        if attr not in new_values:
-                            new_values[attr] = []
-                        new_values[attr].append(val)
+                    val_id = attr_values.get(val)
+                    if val_id is None:
+                        val_id = attr_values[val] = len(attr_values) + 1
+                        new_values.setdefault(attr, []).append(val)
+                    val_ids.append(val_id)
 
-            # Create the vector for the current cell.
-            span_val = []
-            if name is not None:
-                span_val.append(name)
-            for attr, vals in attr_vals.items():
                 assert len(span) == len(
                     vals
                 ), "Must be the same amount of spans as attribute values."
                 # Not base64 the attributes to save space since there aren't
                 # that many of them.
-                span_val.append(attrs[attr])
-                span_val.append(
-                    base64str(
-                        [
-                            0 if val is None else values[attr][str(val)]
-                            for val in vals
-                        ]
-                    )
-                )
-
-            cell.append(base64str(contig_spans(span)))
+                span_val.append(attr_id)
+                span_val.append(base64str(val_ids))
+
+            cell.append(contig_spans_base64str(span))
             cell.append(span_val)
 
         # Output the lines (attributes, values and the cell value itself).
+        lines = []
         if new_attrs:
-            write_jsonl(["@"] + new_attrs)
-        if new_values:
-            for k, vals in new_values.items():
-                write_jsonl(["$", k] + vals)
-        write_jsonl(cell)
+            lines.append(["@"] + new_attrs)
+        for k, vals in new_values.items():
+            lines.append(["$", k] + vals)
+        lines.append(cell)
+        write_jsonl(lines)
 
     # Write the header once and return the write function to be called by users.
-    write_jsonl({"version": "0.3", "rows": n_rows, "cols": n_cols})
+    write_jsonl([{"version": "0.3", "rows": n_rows, "cols": n_cols}])
     return write
 
 
@@ -627,7 +652,8 @@ def enrich_row(
     enriched_row = []
 
     for cell in row_values:
-        cell = str(cell)
+        if not isinstance(cell, str):
+            cell = str(cell)
 
         enriched_cell = atterize_fn(cell, *atterize_args)
         adjust_span_offsets_from_char_to_byte(cell, enriched_cell)
@@ -656,13 +682,28 @@ def adjust_span_offsets_from_char_to_byte(
     :rtype: enricher.EnrichedCell
     """
 
+    # Character offsets are already byte offsets in an ascii cell.
+    if cell.isascii():
+        return enriched_cell
+
+    # Only the offsets of the span endpoints are needed. Walking them in order,
+    # the text between consecutive endpoints is encoded as a whole to advance
+    # the byte offset.
+    endpoints = sorted(
+        {
+            offset
+            for context in enriched_cell
+            for span in context[0]
+            for offset in span
+        }
+    )
     byte_offsets = {}
+    char_offset = 0
     byte_offset = 0
-
-    for char_offset, ch in enumerate(cell):
-        byte_offsets[char_offset] = byte_offset
-        byte_offset += len(ch.encode("utf-8"))
-    byte_offsets[len(cell)] = byte_offset
+    for endpoint in endpoints:
+        byte_offset += len(cell[char_offset:endpoint].encode("utf-8"))
+        byte_offsets[endpoint] = byte_offset
+        char_offset = endpoint
 
     for context in enriched_cell:
         spans = context[0]
@@ -692,6 +733,62 @@ def init_args(*args) -> None:
     ENRICHMENT_ARGS = args
 
 
+def count_rows(in_file: str) -> Optional[int]:
+    """
+    This function counts the rows of a csv formatted dataset, excluding its
+    header. When the file contains no quote character, no cell can contain an
+    embedded newline, so the newlines are counted directly on the raw bytes
+    instead of parsing every row with ``csv.reader``. Otherwise, or if a row
+    ends with a lone carriage return, the rows are parsed to get an exact count.
+
+    :param in_file: The filepath of the csv formatted dataset.
+    :type in_file: str
+    :return: The number of rows of the dataset, excluding its header, or None if
+        it has no rows.
+    :rtype: int, optional
+    """
+
+    n_newlines = 0
+    last_chunk = b""
+    with open(in_file, "rb") as f:
+        for chunk in iter(lambda: f.read(COUNT_ROWS_BUFSIZE), b""):
+            if b'"' in chunk or LONE_CR_PATTERN.search(chunk):
+                break
+            n_newlines += chunk.count(b"\n")
+            last_chunk = chunk
+        else:
+            # The last row may not be terminated by a newline.
+            if last_chunk and not last_chunk.endswith(b"\n"):
+                n_newlines += 1
+            return n_newlines - 1 if n_newlines > 1 else None
+
+    with open(in_file, encoding="utf-8", newline="") as infile:
+        in_reader = csv.reader(infile)
+        next(in_reader, None)
+        n_rows = None
+        for n_rows, _ in enumerate(in_reader, 1):
+            pass
+        return n_rows
+
+
+@lru_cache(maxsize=None)
+def get_n_processes() -> int:
+    """
+    This function returns the number of processes used for multiprocessing the
+    data enrichment, that is the number of physical cpu cores, capped by the
+    number of cpus this process is allowed to run on (e.g. in a container). It
+    is computed once and cached.
+
+    :return: The number of processes.
+    :rtype: int
+    """
+
+    n_processes = psutil.cpu_count(logical=False) or os.cpu_count() or 1
+    if hasattr(os, "sched_getaffinity"):
+        n_processes = min(n_processes, len(os.sched_getaffinity(0)))
+    return n_processes
+
+
 def enrich(
     in_file: str,
     out_file: str,
@@ -760,11 +857,8 @@ def enrich_by_row(
     """
 
     with open(in_file, encoding="utf-8", newline="") as infile:
-        in_reader = csv.reader(infile)
-        n_cols = len(next(in_reader))
-        n_rows = None
-        for n_rows, _ in enumerate(in_reader, 1):
-            pass
+        n_cols = len(next(csv.reader(infile)))
+    n_rows = count_rows(in_file)
 
     with open(in_file, encoding="utf-8", newline="") as infile, open(
         out_file, "w", encoding="utf-8"
@@ -776,20 +870,21 @@ def enrich_by_row(
 
         if IS_MULTIPROC:
             # Parallelize to the number of available cores (not the number of
-            # available hyper threads). ``psutil`` is the only standard Python
-            # package that can provide this measure (with logical=False).
+            # available hyper threads), see :func:`get_n_processes`.
             # Testing revealed wall times to be quite close to using all logical
             # CPUs, with better overall system responsiveness and less thermal
             # throttling in this scenario.
             # Additionally, as Python's threading uses a GIL, it is unsuitable
-            # for this task. Use its multiprocessing intsead. However,
-            # multiprocessing uses pickle and is unable to send functions across
-            # process boundaries, hence the global variable set by the
-            # initializer.
+            # for this task. Use its multiprocessing intsead. The enrichment
+            # objects (e.g. NLP models) are sent to each worker once by the
+            # initializer and kept in a per-process global, rather than bound
+            # to the enrichment function with ``functools.partial``, which
+            # would pickle them again with every chunk sent to a worker. This
+            # also keeps the ``enrich_fn(row_or_col)`` signature unchanged.
             with Pool(
                 initializer=init_args,
                 initargs=enrichment_args,
-                processes=psutil.cpu_count(logical=False),
+                processes=get_n_processes(),
             ) as pool:
                 for enriched_row in pool.imap(
                     func=enrich_row_fn,
@@ -834,12 +929,9 @@ def enrich_by_col(
     """
 
     with open(in_file, encoding="utf-8", newline="") as infile:
-        in_reader = csv.reader(infile)
-        col_names = next(in_reader)
-        n_cols = len(col_names)
-        n_rows = None
-        for n_rows, _ in enumerate(in_reader, 1):
-            pass
+        col_names = next(csv.reader(infile))
+    n_cols = len(col_names)
+    n_rows = count_rows(in_file)
 
     with open(out_file, "w", encoding="utf-8") as outfile:
 
@@ -866,20 +958,21 @@ def enrich_by_col(
 
         if IS_MULTIPROC:
             # Parallelize to the number of available cores (not the number of
-            # available hyper threads). ``psutil`` is the only standard Python
-            # package that can provide this measure (with logical=False).
+            # available hyper threads), see :func:`get_n_processes`.
             # Testing revealed wall times to be quite close to using all logical
             # CPUs, with better overall system responsiveness and less thermal
             # throttling in this scenario.
             # Additionally, as Python's threading uses a GIL, it is unsuitable
-            # for this task. Use its multiprocessing intsead. However,
-            # multiprocessing uses pickle and is unable to send functions across
-            # process boundaries, hence the global variable set by the
-            # initializer.
+            # for this task. Use its multiprocessing intsead. The enrichment
+            # objects (e.g. NLP models) are sent to each worker once by the
+            # initializer and kept in a per-process global, rather than bound
+            # to the enrichment function with ``functools.partial``, which
+            # would pickle them again with every chunk sent to a worker. This
+            # also keeps the ``enrich_fn(row_or_col)`` signature unchanged.
             with Pool(
                 initializer=init_args,
                 initargs=enrichment_args,
-                processes=psutil.cpu_count(logical=False),
+                processes=get_n_processes(),
             ) as pool:
                 for enriched_row in __enriched_cols_to_enriched_rows(
                     # Put into memory for speed, but may need to trade-off speed
@@ -974,10 +1067,28 @@ def get_vars_for_enrich_row_with_attribute_data(
 
     else:
         attr_name_list = attr_names.split(",")
-        attr_locs = list(map(attr_name_list_all.index, attr_name_list))
+        # Keep the first location of a duplicated name, like ``list.index``.
+        attr_name_locs = {}
+        for i, attr_name in enumerate(attr_name_list_all):
+            attr_name_locs.setdefault(attr_name, i)
+        try:
+            attr_locs = [attr_name_locs[name] for name in attr_name_list]
+        except KeyError as e:
+            raise ValueError(f"{e.args[0]!r} is not in list") from e
+
+        first_loc = attr_locs[0]
+        if attr_locs == list(range(first_loc, first_loc + len(attr_locs))):
+            # Contiguous columns, which is the common case, are sliced.
+            attr_slice = slice(first_loc, first_loc + len(attr_locs))
+
+            def get_attr_row(attr_row_all):
+                return attr_row_all[attr_slice]
 
-        def get_attr_row(attr_row_all):
-            return list(map(attr_row_all.__getitem__, attr_locs))
+        else:
+            pick_attrs = itemgetter(*attr_locs)
+
+            def get_attr_row(attr_row_all):
+                return list(pick_attrs(attr_row_all))
 
     return get_attr_row, attr_name_list, attr_reader
 
@@ -1090,14 +1201,15 @@ def atterize_values_in_cell(
     :type cell: str
     :param attribute_name: The attribute name.
     :type attribute_name: str
+    :param values: The list of value patterns to find, preferably compiled.
+    :type values: List[re.Pattern]
     :return: The enriched cell.
     :rtype: enricher.EnrichedCell
     """
 
     cell = str(cell)
     matches = [
-        [(m.start(), m.end()) for m in re.finditer(pattern, cell)]
-        for pattern in values
+        [m.span() for m in re.finditer(pattern, cell)] for pattern in values
     ]
     spans = list(merge(*matches))
     return [(spans, {}, attribute_name)]
@@ -1123,12 +1235,17 @@ def create_attribute_for_values(
     :rtype: str
     """
 
+    # Compile the values once up front; ``re`` only caches a limited number of
+    # compiled patterns, so a long list of values would otherwise be recompiled
+    # for every cell.
+    patterns = [re.compile(value) for value in values]
+
     in_file, out_file, out_filename = get_context(attribute_name)
     enrich(
         in_file,
         out_file,
         enrich_row,
-        (atterize_values_in_cell, attribute_name, values),
+        (atterize_values_in_cell, attribute_name, patterns),
     )
     return out_filename
 
@@ -8,20 +8,31 @@ import csv
 import io
 import json
 import os
+import re
+import shutil
 import socket
 import subprocess
 import sys
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from itertools import chain
 from typing import (
     Any,
+    BinaryIO,
     Callable,
+    Deque,
     Dict,
     Generator,
+    Iterator,
     List,
     Literal,
     Optional,
+    Tuple,
     Union,
     Mapping,
+    cast,
 )
 from urllib.parse import urlencode
 from uuid import uuid4
@@ -29,6 +40,11 @@ from uuid import uuid4
 import chardet
 import requests
 
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover
+    orjson = None  # type: ignore
+
 from watchful.__about__ import __version__
 
 
@@ -37,7 +53,27 @@ SCHEME: Literal["http", "https"] = "http"
 HOST: str = "localhost"
 PORT: Optional[str] = "9002"
 API_TIMEOUT_SEC: int = 600
+EXPORT_BUFSIZE: int = 1 << 20
+DETECT_BLOCKSIZE: int = 1 << 16
 TOKEN: Optional[str] = None
+SESSION: Optional[requests.Session] = None
+CONNECT_RETRIES: int = 3
+# The polling delays in seconds used by ``await_summary``, starting at the
+# minimum and doubling up to the maximum.
+AWAIT_MIN_DELAY_SEC: float = 0.001
+AWAIT_MAX_DELAY_SEC: float = 0.05
+# The number of seconds ``config`` is cached for, unless invalidated earlier by
+# a call that changes it; 0 disables the cache.
+CONFIG_CACHE_TTL_SEC: float = 60
+_CONFIG_CACHE: Optional[Dict] = None
+_CONFIG_CACHE_EXPIRY: float = 0.0
+# The "nop" action used to poll the summary, serialized once.
+_NOP_ACTION: bytes = b'{"verb":"nop"}'
+# The positions after a carriage return that is not followed by a newline,
+# where the ``csv`` module also ends a line.
+_CSV_LONE_CR = re.compile(rb"(?<=\r)(?!\n)")
+# The backend process started by ``ephemeral``.
+_EPHEMERAL_PROC: Optional[subprocess.Popen] = None
 
 
 def _refresh() -> None:
@@ -51,6 +87,42 @@ def _refresh() -> None:
     print(f"watchful version: {watchful.__about__.__version__}")
 
 
+def _json_dumps(obj: Any) -> bytes:
+    """
+    This function serializes ``obj`` to JSON, using ``orjson`` when it is
+    installed as it is considerably faster, otherwise the standard ``json``.
+    The JSON document is returned as the utf-8 bytes that are sent on the wire,
+    so that ``requests`` neither re-encodes it nor has to measure a string for
+    the ``Content-Length`` header.
+
+    :param obj: The object to serialize.
+    :type obj: Any
+    :return: The utf-8 encoded JSON document.
+    :rtype: bytes
+    """
+
+    if orjson is None:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    return orjson.dumps(obj)
+
+
+def _json_loads(json_doc: Union[str, bytes]) -> Any:
+    """
+    This function deserializes the JSON document ``json_doc``, using ``orjson``
+    when it is installed as it is considerably faster, otherwise the standard
+    ``json``. Both accept utf-8 bytes, so there is no need to decode them first.
+
+    :param json_doc: The JSON document.
+    :type json_doc: Union[str, bytes]
+    :return: The deserialized object.
+    :rtype: Any
+    """
+
+    if orjson is None:
+        return json.loads(json_doc)
+    return orjson.loads(json_doc)
+
+
 def _get_conn_url() -> str:
     """
     This function creates the HTTP connection url from the global ``SCHEME``,
@@ -68,6 +140,49 @@ def _get_conn_url() -> str:
     return f"{SCHEME}://{HOST}:{PORT}" if PORT else f"{SCHEME}://{HOST}"
 
 
+def _get_session() -> requests.Session:
+    """
+    This function returns the global ``SESSION``, creating it on first use. The
+    session keeps its connections to the Watchful application alive, so that
+    consecutive API calls do not each pay for a new connection, and retries
+    connecting up to ``CONNECT_RETRIES`` times.
+
+    :return: The HTTP session.
+    :rtype: requests.Session
+    """
+
+    global SESSION
+    if SESSION is None:
+        SESSION = requests.Session()
+        SESSION.headers["x-watchful-sdk"] = __version__
+        # Only retry failing to connect, which is safe for every API call as
+        # nothing has been sent yet; most API calls are not idempotent.
+        adapter = requests.adapters.HTTPAdapter(
+            max_retries=requests.adapters.Retry(
+                total=CONNECT_RETRIES,
+                connect=CONNECT_RETRIES,
+                read=0,
+                status=0,
+                backoff_factor=0.1,
+            )
+        )
+        SESSION.mount("http://", adapter)
+        SESSION.mount("https://", adapter)
+    return SESSION
+
+
+def _close_session() -> None:
+    """
+    This function closes the global ``SESSION`` and its connections, if any; a
+    new session is created on the next API call.
+    """
+
+    global SESSION
+    if SESSION is not None:
+        SESSION.close()
+        SESSION = None
+
+
 def await_port_opening(port: int, timeout_sec: int = 10) -> None:
     """
     This function waits for the port to be open; it returns None if ``port`` was
@@ -80,14 +195,25 @@ def await_port_opening(port: int, timeout_sec: int = 10) -> None:
     :type timeout_sec: int, optional
     """
 
-    end = time.time_ns() + (timeout_sec * 1_000_000_000)
-    while time.time_ns() < end:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout_sec)
-        res = sock.connect_ex((HOST, port))
+    # Resolve the host once rather than on every connection attempt.
+    family, type_, proto, _, sockaddr = socket.getaddrinfo(
+        HOST, port, socket.AF_INET, socket.SOCK_STREAM
+    )[0]
+    end = time.monotonic() + timeout_sec
+    # A refused connection returns immediately, so back off between attempts
+    # the same way as ``await_summary`` rather than probing every millisecond.
+    delay = AWAIT_MIN_DELAY_SEC
+    while time.monotonic() < end:
+        # A socket cannot be reused after a failed connection attempt, but it
+        # is closed right away instead of being left to the garbage collector.
+        # With a timeout set, the connection attempt itself waits in the kernel.
+        with socket.socket(family, type_, proto) as sock:
+            sock.settimeout(max(end - time.monotonic(), 0.001))
+            res = sock.connect_ex(sockaddr)
         if res == 0:
             return None
-        time.sleep(0.001)
+        time.sleep(delay)
+        delay = min(delay * 2, AWAIT_MAX_DELAY_SEC)
 
     raise TimeoutError("Timed out waiting for Watchful to start")
 
@@ -124,34 +250,60 @@ def await_summary(
     pred: Callable,
     halt_fn: Callable = lambda x: False,
     unchanged_timeout: int = 60,
+    quick_check: bytes = b"",
 ) -> Optional[Dict]:
     """
     This function returns the summary once ``pred(summary)`` returns true, or
     stops waiting once ``halt_fn`` returns true and then returns None, or raises
     an exception if the summary is unchanged for ``unchanged_timeout`` seconds.
 
+    If ``quick_check`` is given, it must be a byte string that is necessarily
+    contained in the raw summary whenever ``pred`` can return true; summaries
+    without it are neither parsed nor passed to ``pred`` and ``halt_fn``.
+
     :param pred: The predicate function.
     :type pred: Callable
     :param halt_fn: The halt function, defaults to lambda x: False.
     :type halt_fn: Callable, optional
     :param unchanged_timeout: The timeout in seconds, defaults to 60.
     :type unchanged_timeout: int, optional
+    :param quick_check: The byte string required in the raw summary before it
+        is parsed, defaults to b"".
+    :type quick_check: bytes, optional
     :return: The dictionary of the HTTP response from :func:`get()`.
     :rtype: Dict, optional
     """
 
-    prev_summary = None
-    end = float("inf")
-    while time.time_ns() < end:
-        summary = get()
-        if halt_fn(summary):
-            return None
-        if pred(summary):
-            return summary
-        if prev_summary == summary:
-            end = time.time_ns() + (unchanged_timeout * 1_000_000_000)
-        prev_summary = summary
-        time.sleep(0.03)  # 30ms sleep for ~30 requests per second
+    prev_content = None
+    # The deadline only runs while the summary stays unchanged.
+    deadline = None
+    # Back off exponentially, so that quick operations return promptly while
+    # longer ones are not polled at the full request rate.
+    delay = AWAIT_MIN_DELAY_SEC
+    while deadline is None or time.monotonic() < deadline:
+        response = _post_action(_NOP_ACTION)
+        content = response.content
+        if content != prev_content:
+            deadline = None
+        elif deadline is None:
+            deadline = time.monotonic() + unchanged_timeout
+        if response.status_code == 200 and (
+            content == prev_content or quick_check not in content
+        ):
+            # Either ``halt_fn`` and ``pred`` were already evaluated on this
+            # very summary, or ``pred`` cannot hold for it, so only the raw
+            # bytes are checked instead of parsing the whole summary.
+            if API_SUMMARY_HOOK_CALLBACK:
+                API_SUMMARY_HOOK_CALLBACK(response.text)
+        else:
+            summary = _read_response(response, response_is_summary=True)
+            if halt_fn(summary):
+                return None
+            if pred(summary):
+                return summary
+        prev_content = content
+        time.sleep(delay)
+        delay = min(delay * 2, AWAIT_MAX_DELAY_SEC)
 
     raise requests.exceptions.Timeout(
         "Timed out awaiting summary. Summary went stale for "
@@ -172,11 +324,11 @@ def _assert_success(summary: Dict) -> Dict:
     :rtype: Dict, optional
     """
 
-    if "error_msg" in summary and summary["error_msg"]:
-        verb_str = ""
-        if "error_verb" in summary and summary["error_verb"]:
-            verb_str = f' ({summary["error_verb"]})'
-        raise ValueError(f'Summary error{verb_str}: {summary["error_msg"]}')
+    error_msg = summary.get("error_msg")
+    if error_msg:
+        error_verb = summary.get("error_verb")
+        verb_str = f" ({error_verb})" if error_verb else ""
+        raise ValueError(f"Summary error{verb_str}: {error_msg}")
 
     return summary
 
@@ -226,18 +378,17 @@ def _read_response(
     assert (
         200 == response.status_code
     ), f"Request could have failed with status {response.status_code}. Reason: {response.reason}"
-    json_str = response.text
-
     if response_is_summary and API_SUMMARY_HOOK_CALLBACK:
-        API_SUMMARY_HOOK_CALLBACK(json_str)
+        API_SUMMARY_HOOK_CALLBACK(response.text)
 
-    ret = json.loads(json_str)
+    ret = _json_loads(response.content)
 
     # One idea:
     # if ret["error_msg"]:
     #     raise Exception(ret["error_msg"])
-    if "error_msg" in ret and ret["error_msg"]:
-        print(f'{ret["error_verb"]}: {ret["error_msg"]}')
+    error_msg = ret.get("error_msg") if isinstance(ret, dict) else None
+    if error_msg:
+        print(f'{ret["error_verb"]}: {error_msg}')
 
     return ret
 
@@ -246,7 +397,7 @@ def request(
     method: str = "GET",
     path: str = "/",
     headers: Optional[Dict[str, str]] = None,
-    data: Optional[Union[str, bytes, io.TextIOWrapper]] = None,
+    data: Optional[Union[str, bytes, io.TextIOWrapper, BinaryIO]] = None,
     timeout: Optional[int] = None,
     stream: Optional[bool] = False,
 ) -> requests.models.Response:
@@ -263,41 +414,27 @@ def request(
     :return: The HTTP response from the connection request.
     :rtype: requests.models.Response
     """
-    default_headers = {"x-watchful-sdk": __version__}
-    global TOKEN
-    if TOKEN is not None:
-        default_headers["Authorization"] = f"Bearer {TOKEN}"
-
     if headers is None:
         headers = {}
-    if headers == {}:
-        headers.update(default_headers)
-    else:
-        headers.update(default_headers)
-
-    path = f"{_get_conn_url()}{path}"
+    # The SDK version header is set once on the session.
+    global TOKEN
+    if TOKEN is not None:
+        headers["Authorization"] = f"Bearer {TOKEN}"
 
-    if method == "GET":
-        return requests.get(
-            path, headers=headers, data=data, timeout=timeout, stream=stream
-        )
-    elif method == "POST":
-        return requests.post(
-            path, headers=headers, data=data, timeout=timeout, stream=stream
-        )
-    elif method == "PUT":
-        return requests.put(
-            path, headers=headers, data=data, timeout=timeout, stream=stream
-        )
-    elif method == "DELETE":
-        return requests.delete(
-            path, headers=headers, data=data, timeout=timeout, stream=stream
-        )
-    else:
+    if method not in ["GET", "POST", "PUT", "DELETE"]:
         raise ValueError(
             f"{method} is not one of the currently implemented methods: GET, POST, PUT, DELETE!"
         )
 
+    return _get_session().request(
+        method,
+        f"{_get_conn_url()}{path}",
+        headers=headers,
+        data=data,
+        timeout=timeout,
+        stream=stream,
+    )
+
 
 def api(verb: str, **kwargs: Any) -> Dict:
     """
@@ -328,16 +465,31 @@ def api_send_action(action: Dict[str, str]) -> Dict:
     :rtype: Dict, optional
     """
 
-    response = request(
+    return _read_response(_post_action(action), response_is_summary=True)
+
+
+def _post_action(
+    action: Union[Dict[str, Any], bytes]
+) -> requests.models.Response:
+    """
+    This function posts an action to the /api endpoint and returns the HTTP
+    response without reading it.
+
+    :param action: The ``verb`` for the API with optional parameters, or the
+        action already serialized to JSON bytes.
+    :type action: Union[Dict, bytes]
+    :return: The HTTP response from the connection request.
+    :rtype: requests.models.Response
+    """
+
+    return request(
         "POST",
         "/api",
         headers={"Content-type": "application/json"},
-        data=json.dumps(action),
+        data=action if isinstance(action, bytes) else _json_dumps(action),
         timeout=API_TIMEOUT_SEC,
     )
 
-    return _read_response(response, response_is_summary=True)
-
 
 def ephemeral(port: str = "9002") -> None:
     """
@@ -348,10 +500,20 @@ def ephemeral(port: str = "9002") -> None:
     :type port: str, optional
     """
 
-    _ = spawn_cmd(
-        f"watchful -p {port} --no-persistence "
-        f">watchful_ephemeral_output.txt 2>&1"
-    )
+    # Start the backend directly rather than through a shell, so that there is
+    # no extra shell process. As with a background job of a shell, it does not
+    # read the caller's stdin and, in its own session, it is not interrupted by
+    # a Ctrl-C meant for the caller. The process is kept, so that it can be
+    # polled and reaped rather than left running unreferenced.
+    global _EPHEMERAL_PROC
+    with open("watchful_ephemeral_output.txt", "wb") as out:
+        _EPHEMERAL_PROC = subprocess.Popen(
+            ["watchful", "-p", str(port), "--no-persistence"],
+            stdin=subprocess.DEVNULL,
+            stdout=out,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+        )
     await_port_opening(int(port))
     external(port=port)
 
@@ -381,6 +543,10 @@ def external(
     ], '`scheme` must be either "http" or "https"!'
 
     global SCHEME, HOST, PORT, TOKEN
+    if (SCHEME, HOST, PORT) != (scheme, host, port):
+        # Drop the connections kept alive to the previous application.
+        _close_session()
+        _invalidate_config()
     SCHEME = scheme
     HOST = host
     PORT = port
@@ -397,7 +563,7 @@ def list_projects() -> List[Dict[str, Union[str, bool]]]:
 
     response = request("GET", "/projects", timeout=API_TIMEOUT_SEC)
 
-    return json.loads(response.text)
+    return _json_loads(response.content)
 
 
 def open_project(id_: str) -> str:
@@ -414,7 +580,7 @@ def open_project(id_: str) -> str:
     response = request(
         "POST",
         "/projects",
-        data=json.dumps(id_),
+        data=_json_dumps(id_),
         headers={"Content-Type": "application/json"},
         timeout=API_TIMEOUT_SEC,
     )
@@ -472,8 +638,9 @@ def get_project_id(summary: Dict) -> str:
     :rtype: str
     """
 
-    if "project_id" in summary:
-        return summary["project_id"]
+    project_id = summary.get("project_id")
+    if project_id is not None:
+        return project_id
 
     raise WatchfulAppInstanceError("No project is currently active.")
 
@@ -491,9 +658,9 @@ def get_dataset_id(summary: Dict) -> str:
     :rtype: str
     """
 
-    if "datasets" in summary:
-        # ``dataset_ids`` should either be empty or contain one dataset id.
-        dataset_ids = summary["datasets"]
+    # ``dataset_ids`` should either be empty or contain one dataset id.
+    dataset_ids = summary.get("datasets")
+    if dataset_ids is not None:
         if len(dataset_ids) == 0:
             raise WatchfulAppInstanceError("No dataset is currently opened.")
         dataset_id = dataset_ids[0]
@@ -519,8 +686,9 @@ def get_watchful_home(summary: Dict, is_local: bool = True) -> str:
     :rtype: str
     """
 
-    if "watchful_home" in summary:
-        return summary["watchful_home"]
+    watchful_home = summary.get("watchful_home")
+    if watchful_home is not None:
+        return watchful_home
     if is_local:
         user_home = os.path.expanduser("~")
         watchful_home = os.path.join(user_home, "watchful")
@@ -632,29 +800,23 @@ def set_column_flag(
     """
 
     summary_columns = get()["columns"]
-    col_names = []
-    for column in summary_columns:
-        col_names.append(column["column_name"])
+    col_names = [column["column_name"] for column in summary_columns]
     n_col_names = len(col_names)
 
     if columns is None:
         col_bools = [pos_sense] * n_col_names
     else:
-        n_columns = len(columns)
+        columns_set = set(columns)
 
-        assert (
-            len(set(columns)) == n_columns
+        assert len(columns_set) == len(
+            columns
         ), f"At least one of the given columns in {columns} is duplicate!"
-        assert len(set(columns) - set(col_names)) == 0, (
+        assert columns_set.issubset(col_names), (
             f"At least one of the given columns in {columns} is not available "
             f"in the dataset columns {col_names}!"
         )
 
-        def __f(x):
-            i = x in columns
-            return i if pos_sense else not i
-
-        col_bools = list(map(__f, col_names))
+        col_bools = [(x in columns_set) == pos_sense for x in col_names]
 
     return api("column_flag", flag=flag, columns=col_bools)
 
@@ -768,8 +930,7 @@ def query_all(q: str, max_pages: int = 0) -> Generator[List[str], None, None]:
         summary = query(q, page)
         if summary is None:
             break
-        for fields in [cand["fields"] for cand in summary["candidates"]]:
-            yield fields
+        yield from (cand["fields"] for cand in summary["candidates"])
         page += 1
         if summary["query_end"] or max_pages and page == max_pages:
             break
@@ -798,7 +959,9 @@ def await_plabels() -> Optional[Dict]:
     :rtype: Dict, optional
     """
 
-    return await_summary(lambda s: s["status"] == "current")
+    return await_summary(
+        lambda s: s["status"] == "current", quick_check=b'"current"'
+    )
 
 
 def hinter_async(class__: str, query_: str, weight: int) -> Dict:
@@ -875,7 +1038,7 @@ def get() -> Dict:
     :rtype: Dict, optional
     """
 
-    return api("nop")
+    return _read_response(_post_action(_NOP_ACTION), response_is_summary=True)
 
 
 def upload_attributes(
@@ -895,7 +1058,10 @@ def upload_attributes(
     :rtype: Dict, optional
     """
 
-    with open(attributes_filepath, encoding="utf-8") as attributes_file:
+    # The attributes file is already utf-8 encoded, so it is streamed as is in
+    # binary mode instead of being decoded and re-encoded chunk by chunk. Its
+    # size on disk gives the Content-Length.
+    with open(attributes_filepath, "rb") as attributes_file:
         response = request(
             "PUT",
             f"/datasets/{dataset_id}/attributes",
@@ -943,41 +1109,130 @@ def _dump(offset: int) -> Dict:
     return api("dump", offset=offset)
 
 
+def _dump_summaries() -> Generator[Dict, None, None]:
+    """
+    This function returns the summaries holding all the chunks of candidates in
+    "hint API order". Every summary also holds the number of candidates and the
+    field names, so the first chunk is requested directly instead of getting the
+    summary beforehand.
+
+    :return: The generator of the summaries of all the chunks.
+    :rtype: Generator[Dict, None, None]
+    """
+
+    summary = _dump(0)
+    # TODO: Add error handling.
+    n_cands = summary["n_candidates"]
+    n_chunk = len(summary["candidates"])
+    offset = n_chunk
+    # Request the next chunk in the background while the current chunk is being
+    # consumed, so that the request latency overlaps with the caller's work. Only
+    # the HTTP request is made in the background; the response is read here, so
+    # that any summary hook is called from the caller's thread as usual.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        while True:
+            # An empty chunk means that there are no more candidates, e.g. if
+            # they changed since the first chunk, so stop rather than requesting
+            # the same offset forever.
+            next_response = (
+                executor.submit(
+                    _post_action, {"verb": "dump", "offset": offset}
+                )
+                if n_chunk and offset < n_cands
+                else None
+            )
+            yield summary
+            if next_response is None:
+                return
+            summary = _read_response(
+                next_response.result(), response_is_summary=True
+            )
+            n_chunk = len(summary["candidates"])
+            offset += n_chunk
+
+
 def dump() -> Generator[List[str], None, None]:
     """
-    This function returns all the candidates in "hint API order".
+    This function returns all the candidates in "hint API order". While a chunk
+    of candidates is being consumed, the next chunk is requested from a
+    background thread, sharing the HTTP session and its connection pool.
 
     :return: The generator of all the candidates.
     :rtype: Generator[List[str], None, None]
     """
 
-    n_cands = get()["n_candidates"]
-    offset = 0
-    chunk = []
-    while offset < n_cands:
-        summary = _dump(offset)
-        # TODO: Add error handling.
-        chunk = summary["candidates"]
-        offset += len(chunk)
-        i = 0
-        while i < len(chunk):
-            yield chunk[i]
-            i += 1
+    for summary in _dump_summaries():
+        yield from summary["candidates"]
 
 
 def dump_dicts() -> Generator[Dict[str, str], None, None]:
     """
     This function returns all the candidates in "hint API order", together with
-    the column names for all values.
+    the column names for all values. Like :func:`dump()`, it requests the next
+    chunk of candidates from a background thread.
 
     :return: The generator of all the candidates, each as a dictionary of named
         values.
     :rtype: Generator[Dict[str, str], None, None]
     """
 
-    field_names = get()["field_names"]
-    for c in dump():
-        yield dict(zip(field_names, c))
+    field_names = None
+    for summary in _dump_summaries():
+        if field_names is None:
+            field_names = summary["field_names"]
+        for c in summary["candidates"]:
+            yield dict(zip(field_names, c))
+
+
+@lru_cache(maxsize=8)
+def _export_stream_prefix(content_type: str, mode: str) -> str:
+    """
+    This function returns the path with the start of the query string for the
+    export_stream call. It is cached as there are only a few content types and
+    modes.
+
+    :param content_type: The content type of the export.
+    :type content_type: str
+    :param mode: The mode of the export.
+    :type mode: str
+    :return: The path with the start of the query string.
+    :rtype: str
+    """
+
+    query_string = urlencode({"content-type": content_type, "mode": mode})
+
+    return f"/export_stream?{query_string}"
+
+
+def _export_stream_path(
+    content_type: str,
+    mode: str,
+    filename: Optional[str],
+    token: Optional[str],
+) -> str:
+    """
+    This function returns the path with the query string for the export_stream
+    call. Only its cached start is reused; the token and filename are encoded on
+    each call so that they are not kept around.
+
+    :param content_type: The content type of the export.
+    :type content_type: str
+    :param mode: The mode of the export.
+    :type mode: str
+    :param filename: The optional filename to use for the export.
+    :type filename: str, optional
+    :param token: The JWT authorization token.
+    :type token: str, optional
+    :return: The path with the query string.
+    :rtype: str
+    """
+
+    query: Dict[str, Optional[str]] = {"token": token}
+    if filename is not None:
+        query["filename"] = filename
+    query_string = urlencode(query)
+
+    return f"{_export_stream_prefix(content_type, mode)}&{query_string}"
 
 
 def export_stream(
@@ -1014,18 +1269,9 @@ def export_stream(
     if token is None:
         token = TOKEN
 
-    query = {
-        "content-type": content_type,
-        "mode": mode,
-        "token": token,
-    }
-    if filename is not None:
-        query["filename"] = filename
-    query_string = urlencode(query)
-    url = f"/export_stream?{query_string}"
     response = request(
         "GET",
-        url,
+        _export_stream_path(content_type, mode, filename, token),
         stream=True,
         timeout=API_TIMEOUT_SEC,
     )
@@ -1060,23 +1306,80 @@ def export_dataset_to_path(
         fields = get()["field_names"]
     n_cols = len(fields)
 
-    with open(out_file, "w", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        stream = export_stream(mode=export_mode).raw
-        stream.auto_close = False
-        byte_stream = io.BytesIO(stream.read())
-        reader = csv.reader(
-            io.TextIOWrapper(byte_stream, encoding="utf-8", newline="")
+    raw_stream = export_stream(mode=export_mode).raw
+    raw_stream.auto_close = False
+    raw_stream.decode_content = True
+    # urllib3's response is a raw binary stream, though not typed as one.
+    stream = io.BufferedReader(
+        cast(io.RawIOBase, raw_stream), buffer_size=EXPORT_BUFSIZE
+    )
+
+    header_bytes, header, rest = _read_csv_record(stream)
+    if header[:n_cols] != fields:
+        raise ValueError(
+            f"Dataset's column names {header} did not match the expected "
+            f"column names {fields}."
         )
-        header = next(reader)
-        if header[:n_cols] != fields:
-            raise ValueError(
-                f"Dataset's column names {header} did not match the expected "
-                f"column names {fields}."
+
+    if len(header) == n_cols:
+        # All the columns are exported, so the stream is copied as is without
+        # parsing it.
+        with open(out_file, "wb", buffering=EXPORT_BUFSIZE) as f:
+            f.write(header_bytes)
+            f.writelines(rest)
+            shutil.copyfileobj(stream, f, EXPORT_BUFSIZE)
+    else:
+        with open(
+            out_file,
+            "w",
+            buffering=EXPORT_BUFSIZE,
+            encoding="utf-8",
+            newline="",
+        ) as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            reader = csv.reader(
+                chain(
+                    (line.decode("utf-8") for line in rest),
+                    io.TextIOWrapper(stream, encoding="utf-8", newline=""),
+                )
             )
-        writer.writerow(fields)
-        for row in reader:
-            writer.writerow(row[:n_cols])
+            writer.writerows(row[:n_cols] for row in reader)
+
+
+def _read_csv_record(stream: BinaryIO) -> Tuple[bytes, List[str], List[bytes]]:
+    """
+    This function reads the first record of the utf-8 encoded csv ``stream``,
+    which spans more than one line if a quoted field contains a newline. The
+    lines are split as by ``open(..., newline="")`` and parsed with :mod:`csv`,
+    which reads on for only as many lines as the record spans.
+
+    :param stream: The csv stream.
+    :type stream: BinaryIO
+    :return: The raw bytes of the record, its fields, and the lines read from
+        the stream past the record.
+    :rtype: Tuple[bytes, List[str], List[bytes]]
+    """
+
+    pending: Deque[bytes] = deque()
+    raw: List[bytes] = []
+
+    def lines() -> Iterator[str]:
+        while True:
+            if not pending:
+                line = stream.readline()
+                if not line:
+                    return
+                # ``readline`` only splits on newlines, but ``csv`` also ends a
+                # line on a lone carriage return.
+                pending.extend(filter(None, _CSV_LONE_CR.split(line)))
+            line = pending.popleft()
+            raw.append(line)
+            yield line.decode("utf-8")
+
+    fields = next(csv.reader(lines()), [])
+
+    return b"".join(raw), fields, list(pending)
 
 
 def export_async(export_mode: str = "ftc") -> Optional[Dict]:
@@ -1129,7 +1432,11 @@ def export_project() -> requests.models.Response:
     :rtype: requests.models.Response
     """
 
-    response = request("GET", "/export_project", timeout=API_TIMEOUT_SEC)
+    # The project file is only read from the response once it is consumed, so
+    # that it can be streamed to disk by :func:`export_project_to_path()`.
+    response = request(
+        "GET", "/export_project", timeout=API_TIMEOUT_SEC, stream=True
+    )
 
     assert (
         200 == response.status_code
@@ -1138,6 +1445,21 @@ def export_project() -> requests.models.Response:
     return response
 
 
+def export_project_to_path(out_file: str) -> None:
+    """
+    This function exports a consolidated version (a single *.hints file) of the
+    currently open project via a buffered stream to the specified output file
+    path, without holding the whole project file in memory.
+
+    :param out_file: The file path to export the project file to.
+    :type out_file: str
+    """
+
+    with export_project() as response, open(out_file, "wb") as f:
+        response.raw.decode_content = True
+        shutil.copyfileobj(response.raw, f, EXPORT_BUFSIZE)
+
+
 def is_utf8(
     csv_bytes: Optional[bytes] = None,
     filepath: Optional[
@@ -1172,12 +1494,24 @@ def is_utf8(
             "Only one of them needs to be specified."
         )
 
+    # Feed the detector block by block, so that it stops as soon as it is
+    # confident of the encoding rather than going through all of the dataset,
+    # and a file is not read into memory as a whole.
+    detector = chardet.UniversalDetector()
     if csv_bytes is not None:
-        res = chardet.detect(csv_bytes)
+        for start in range(0, len(csv_bytes), DETECT_BLOCKSIZE):
+            detector.feed(csv_bytes[start : start + DETECT_BLOCKSIZE])
+            if detector.done:
+                break
+        res = detector.close()
     elif filepath is not None:
         if os.path.isfile(filepath):
             with open(filepath, "rb") as f:
-                res = chardet.detect(f.read())
+                for block in iter(partial(f.read, DETECT_BLOCKSIZE), b""):
+                    detector.feed(block)
+                    if detector.done:
+                        break
+            res = detector.close()
         else:
             raise FileNotFoundError(
                 f"There is no file at the given file path {filepath!r}!"
@@ -1238,37 +1572,92 @@ def create_dataset(
     TODO: Add error handling.
     """
 
-    is_csv_bytes_utf8 = is_utf8(csv_bytes, None, threshold_detect)
+    # The detected encoding only matters when loading is not forced.
+    if force_load or is_utf8(csv_bytes, None, threshold_detect):
+        return _stream_dataset(csv_bytes, columns, filename, has_header)
 
-    if is_csv_bytes_utf8 or force_load:
-        id_ = str(uuid4())
-        response = request(
-            "POST",
-            f"/api/_stream/{id_}/0/true",
-            data=csv_bytes,
-            headers={"Content-Type": "text/csv"},
-            timeout=API_TIMEOUT_SEC,
-        )
-        _ = _read_response(response)
+    raise Warning(
+        "Dataset is not loaded as the encoding of the csv dataset is not "
+        "detected to be utf-8 and dataset loading is not forced."
+    )
 
-        params = json.dumps({"filename": filename, "has_header": has_header})
-        response = request(
-            "POST",
-            f"/api/_stream/{id_}",
-            data=params,
-            headers={"Content-Type": "application/json"},
-            timeout=API_TIMEOUT_SEC,
-        )
-        dataset_id = _read_response(response)["id"]
 
-        api("dataset_add", id=dataset_id, columns=columns)
+def create_dataset_stream(
+    csv_file: BinaryIO,
+    columns: List[str],
+    filename: str = "none",
+    has_header: bool = True,
+) -> str:
+    """
+    This function loads the specified columns of a utf-8 encoded csv dataset
+    from a binary file object and returns the dataset id. Unlike
+    :func:`create_dataset()`, the csv dataset is streamed from ``csv_file`` as
+    it is sent rather than being held in memory as a whole, so its encoding is
+    not detected.
 
-        return dataset_id
+    :param csv_file: The csv dataset binary file object.
+    :type csv_file: BinaryIO
+    :param columns: The list of column names to use.
+    :type columns: List[str]
+    :param filename: The csv dataset filename, defaults to "none".
+    :type filename: str, optional
+    :param has_header: The boolean indicating if the csv dataset has a header,
+        defaults to True.
+    :type has_header: bool, optional
+    :return: The dataset id.
+    :rtype: str
+    """
 
-    raise Warning(
-        "Dataset is not loaded as the encoding of the csv dataset is not "
-        "detected to be utf-8 and dataset loading is not forced."
+    return _stream_dataset(csv_file, columns, filename, has_header)
+
+
+def _stream_dataset(
+    data: Union[bytes, BinaryIO],
+    columns: List[str],
+    filename: str,
+    has_header: bool,
+) -> str:
+    """
+    This function streams the csv dataset ``data`` to the Watchful application,
+    adds its specified columns and returns the dataset id.
+
+    :param data: The csv dataset bytes or binary file object.
+    :type data: Union[bytes, BinaryIO]
+    :param columns: The list of column names to use.
+    :type columns: List[str]
+    :param filename: The csv dataset filename.
+    :type filename: str
+    :param has_header: The boolean indicating if the csv dataset has a header.
+    :type has_header: bool
+    :return: The dataset id.
+    :rtype: str
+    """
+
+    id_ = str(uuid4())
+    # A file object is sent in blocks as it is read, instead of being read into
+    # memory first.
+    response = request(
+        "POST",
+        f"/api/_stream/{id_}/0/true",
+        data=data,
+        headers={"Content-Type": "text/csv"},
+        timeout=API_TIMEOUT_SEC,
     )
+    _ = _read_response(response)
+
+    params = _json_dumps({"filename": filename, "has_header": has_header})
+    response = request(
+        "POST",
+        f"/api/_stream/{id_}",
+        data=params,
+        headers={"Content-Type": "application/json"},
+        timeout=API_TIMEOUT_SEC,
+    )
+    dataset_id = _read_response(response)["id"]
+
+    api("dataset_add", id=dataset_id, columns=columns)
+
+    return dataset_id
 
 
 def label_single(row: List[str]) -> List[str]:
@@ -1281,15 +1670,30 @@ def label_single(row: List[str]) -> List[str]:
     :rtype: List[str]
     """
 
+    return label_batch([row])[0]
+
+
+def label_batch(rows: List[List[str]]) -> List[List[str]]:
+    """
+    This function labels the candidate rows with a single request.
+
+    :param rows: The candidate rows.
+    :type rows: List[List[str]]
+    :return: The plabels for each of the candidate rows.
+    :rtype: List[List[str]]
+    """
+
+    if not rows:
+        return []
     sio = io.StringIO()
     w = csv.writer(sio)
-    w.writerow(row)
-    csv_row = sio.getvalue().encode("utf-8")
+    w.writerows(rows)
+    csv_rows = sio.getvalue().encode("utf-8")
     sio.close()
     response = request(
         "POST",
         "/label",
-        data=csv_row,
+        data=csv_rows,
         headers={"Content-Type": "text/csv"},
         timeout=API_TIMEOUT_SEC,
     )
@@ -1297,16 +1701,19 @@ def label_single(row: List[str]) -> List[str]:
     csv_str = io.StringIO(response_body)
     rdr = csv.reader(csv_str)
     rdr_list = list(rdr)
-    if len(rdr_list) == 2:
+    if len(rdr_list) == len(rows) + 1:
         fields = []
         for col in get()["columns"]:
             fields.append(col["column_name"])
         assert (
             fields == rdr_list[0][: len(fields)]
-        ), "server prepended the header to the labeled row"
+        ), "server prepended the header to the labeled rows"
+        del rdr_list[0]
     else:
-        assert len(rdr_list) == 1, "server returned a single row"
-    return rdr_list[-1]
+        assert len(rdr_list) == len(
+            rows
+        ), "server returned a labeled row for each row"
+    return rdr_list
 
 
 def config_set(key: str, value: str) -> Optional[Dict]:
@@ -1322,7 +1729,8 @@ def config_set(key: str, value: str) -> Optional[Dict]:
     :rtype: Dict, optional
     """
 
-    params = json.dumps({"verb": "set", "key": key, "value": value})
+    _invalidate_config()
+    params = _json_dumps({"verb": "set", "key": key, "value": value})
     response = request(
         "POST",
         "/config",
@@ -1338,20 +1746,42 @@ def config() -> Optional[Dict]:
     """
     This function retrieves the app instance configuration parameters
     ``remote``, ``username``, ``role`` and ``authorization`` and their values.
+    The configuration is cached for ``CONFIG_CACHE_TTL_SEC`` seconds, or until
+    it is changed through this client.
 
     :return: A dictionary of key value pairs
     :rtype: Dict, optional
     """
 
-    response = request(
-        "GET",
-        "/config",
-        data=None,
-        headers={"Content-Type": "application/json"},
-        timeout=API_TIMEOUT_SEC,
-    )
+    global _CONFIG_CACHE, _CONFIG_CACHE_EXPIRY
+    if _CONFIG_CACHE is None or time.monotonic() >= _CONFIG_CACHE_EXPIRY:
+        response = request(
+            "GET",
+            "/config",
+            data=None,
+            headers={"Content-Type": "application/json"},
+            timeout=API_TIMEOUT_SEC,
+        )
+        ret = _read_response(response)
+        # Only a successful configuration is cached; anything else is returned
+        # as is and retrieved again on the next call.
+        if not isinstance(ret, dict) or ret.get("error_msg"):
+            _invalidate_config()
+            return ret
+        _CONFIG_CACHE = ret
+        _CONFIG_CACHE_EXPIRY = time.monotonic() + CONFIG_CACHE_TTL_SEC
 
-    return _read_response(response)
+    return dict(_CONFIG_CACHE)
+
+
+def _invalidate_config() -> None:
+    """
+    This function drops the cached configuration, so that the next call to
+    :func:`config()` retrieves it again.
+    """
+
+    global _CONFIG_CACHE
+    _CONFIG_CACHE = None
 
 
 def set_hub_url(url: str) -> Optional[Dict]:
@@ -1364,6 +1794,7 @@ def set_hub_url(url: str) -> Optional[Dict]:
     :return: The dictionary of the HTTP response from the connection request.
     :rtype: Dict, optional
     """
+    _invalidate_config()
     response = request(
         "POST",
         "/set_hub_url",
@@ -1390,20 +1821,9 @@ def candidate_dicts(summary: Optional[Dict] = None) -> List[Dict[str, str]]:
 
     if summary is None:
         summary = get()
+    field_names = summary["field_names"]
 
-    def combine(c: Any):
-        if summary is None:
-            # This should never happen, but is here to convince mypy
-            # that it should never happen.
-            raise ValueError("Error reading the summary")
-        return dict(zip(summary["field_names"], c["fields"]))
-
-    return list(
-        map(
-            combine,
-            summary["candidates"],
-        )
-    )
+    return [dict(zip(field_names, c["fields"])) for c in summary["candidates"]]
 
 
 ## Hub API
@@ -1424,12 +1844,15 @@ def hub_api(verb: str, token: str) -> Optional[Dict]:
     :rtype: Dict, optional
     """
 
-    headers = {"Content-Type": "application/json"}
-    headers.update({"Authorization": "Bearer " + token})
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+    _invalidate_config()
     response = request(
         "POST",
         "/remote",
-        data=json.dumps({"verb": verb}),
+        data=_json_dumps({"verb": verb}),
         headers=headers,
         timeout=API_TIMEOUT_SEC,
     )
@@ -1451,12 +1874,15 @@ def hub_api_with_data(token: str, data: Dict) -> Optional[Dict]:
     :rtype: Dict, optional
     """
 
-    headers = {"Content-Type": "application/json"}
-    headers.update({"Authorization": "Bearer " + token})
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}",
+    }
+    _invalidate_config()
     response = request(
         "POST",
         "/remote",
-        data=json.dumps(data),
+        data=_json_dumps(data),
         headers=headers,
         timeout=API_TIMEOUT_SEC,
     )
@@ -1475,15 +1901,18 @@ def login(email: str, password: str) -> Optional[Dict]:
     :rtype: Dict, optional
     """
 
-    headers = {"Content-Type": "application/json"}
-    credentials = base64.b64encode(str.encode(f"{email}:{password}")).decode(
-        "utf-8"
-    )
-    headers.update({"Authorization": f"Basic {credentials}"})
+    credentials = base64.b64encode(
+        email.encode("utf-8") + b":" + password.encode("utf-8")
+    ).decode("ascii")
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Basic {credentials}",
+    }
+    _invalidate_config()
     response = request(
         "POST",
         "/remote",
-        data=json.dumps({"verb": "login"}),
+        data=_json_dumps({"verb": "login"}),
         headers=headers,
         timeout=API_TIMEOUT_SEC,
     )
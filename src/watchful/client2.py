@@ -103,8 +103,8 @@ class Client:
 
     def wait_for_ready(self, timeout: int = 10) -> None:  # pragma: no cover
         """Wait for the Watchful service to be ready."""
-        end = time.time_ns() + (timeout * 1_000_000_000)
-        while time.time_ns() < end:
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
             try:
                 self._session.get(self._root_url)
                 return
@@ -161,8 +161,8 @@ class Client:
         # It's _possible_ this loop isn't needed here (and probably shouldn't
         # be, regardless). It's probably a standard practice to get the summary
         # and check for validity with the recent changes, for now.
-        end = time.time_ns() + (self.timeout * 1_000_000_000)
-        while time.time_ns() < end:
+        end = time.monotonic() + self.timeout
+        while time.monotonic() < end:
             summary = self.get_summary()
             if summary.title == title and summary.datasets == [dataset_id]:
                 return summary
@@ -210,8 +210,8 @@ class Client:
             json={"verb": "column_flag", "flag": flag, "columns": columns},
         )
 
-        end = time.time_ns() + (self.timeout * 1_000_000_000)
-        while time.time_ns() < end:
+        end = time.monotonic() + self.timeout
+        while time.monotonic() < end:
             summary = self.get_summary()
             if summary.column_flags[flag] == columns:
                 return summary
@@ -264,8 +264,8 @@ class Client:
             },
         )
 
-        end = time.time_ns() + (self.timeout * 1_000_000_000)
-        while time.time_ns() < end:
+        end = time.monotonic() + self.timeout
+        while time.monotonic() < end:
             summary = self.get_summary()
             if summary.query_completed and summary.query != query:
                 return summary
@@ -295,8 +295,8 @@ class Client:
             },
         )
 
-        end = time.time_ns() + (self.timeout * 1_000_000_000)
-        while time.time_ns() < end:
+        end = time.monotonic() + self.timeout
+        while time.monotonic() < end:
             summary = self.get_summary()
             if summary.status == "current":
                 return summary
@@ -321,8 +321,8 @@ class Client:
             },
         )
 
-        end = time.time_ns() + (self.timeout * 1_000_000_000)
-        while time.time_ns() < end:
+        end = time.monotonic() + self.timeout
+        while time.monotonic() < end:
             summary = self.get_summary()
             if summary.status == "current":
                 return summary
@@ -345,8 +345,8 @@ class Client:
             },
         )
 
-        end = time.time_ns() + (self.timeout * 1_000_000_000)
-        while time.time_ns() < end:
+        end = time.monotonic() + self.timeout
+        while time.monotonic() < end:
             summary = self.get_summary()
             if summary.status == "current":
                 return summary
@@ -1,9 +1,18 @@
+import io
 import json
+import os
+import socket
+import subprocess
+import tempfile
+import threading
 import unittest
+from unittest import mock
 
+import requests
 import responses
 
 from watchful import client
+from watchful.__about__ import __version__
 
 
 class TestExternal(unittest.TestCase):
@@ -28,6 +37,23 @@ class TestExternal(unittest.TestCase):
         self.assertEqual("lolcathost", client.HOST)
 
 
+class TestAwaitPortOpening(unittest.TestCase):
+    def test_await_port_opening(self):
+        """An open port is awaited without raising."""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+            server.bind((client.HOST, 0))
+            server.listen()
+            port = server.getsockname()[1]
+
+            self.assertIsNone(client.await_port_opening(port, timeout_sec=1))
+
+    def test_await_port_opening_timeout(self):
+        """A port that is not opened within the timeout raises."""
+        self.assertRaises(
+            TimeoutError, client.await_port_opening, 9002, timeout_sec=0
+        )
+
+
 class TestClient(unittest.TestCase):
     URL_ROOT = "http://localhost:9002"
 
@@ -96,6 +122,10 @@ class TestClient(unittest.TestCase):
         value = client.open_project("abc123")
 
         self.assertEqual('"OK"', value)
+        request = responses.calls[0].request
+        self.assertEqual(__version__, request.headers["x-watchful-sdk"])
+        self.assertEqual(b'"abc123"', request.body)
+        self.assertEqual("8", request.headers["Content-Length"])
 
     @responses.activate
     def test_create_project(self):
@@ -131,6 +161,515 @@ class TestClient(unittest.TestCase):
 
         self.assertEqual('"OK"\n', value)
 
+    def test_assert_success(self):
+        """A summary without an error message is returned as is."""
+        summary = {"status": "current", "error_msg": None}
+
+        self.assertIs(summary, client._assert_success(summary))
+
+    def test_assert_success_error(self):
+        """A summary with an error message raises, naming the verb."""
+        summary = {"error_msg": "Unknown class", "error_verb": "hinter"}
+
+        with self.assertRaises(ValueError) as cm:
+            client._assert_success(summary)
+
+        self.assertEqual(
+            "Summary error (hinter): Unknown class", str(cm.exception)
+        )
+
+    @responses.activate
+    def test_get(self):
+        """The summary is polled with the "nop" action."""
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"status": "current"}),
+        )
+
+        summary = client.get()
+
+        self.assertEqual({"status": "current"}, summary)
+        self.assertEqual(
+            {"verb": "nop"}, json.loads(responses.calls[0].request.body)
+        )
+
+    @responses.activate
+    def test_await_summary(self):
+        """Unchanged summaries are skipped until the predicate holds."""
+        for status in ["not current", "not current", "current"]:
+            responses.add(
+                "POST",
+                f"{self.URL_ROOT}/api",
+                body=json.dumps({"status": status}),
+            )
+        summaries = []
+        client.register_summary_hook(summaries.append)
+        self.addCleanup(client.register_summary_hook, None)
+
+        summary = client.await_summary(lambda s: s["status"] == "current")
+
+        self.assertEqual({"status": "current"}, summary)
+        self.assertEqual(3, len(summaries))
+
+    @responses.activate
+    def test_await_summary_unchanged_timeout(self):
+        """A summary that stays unchanged for the timeout raises."""
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"status": "not current"}),
+        )
+
+        self.assertRaises(
+            requests.exceptions.Timeout,
+            client.await_summary,
+            lambda s: s["status"] == "current",
+            unchanged_timeout=0,
+        )
+
+    @responses.activate
+    def test_await_summary_quick_check(self):
+        """Summaries without the quick check bytes are not parsed."""
+        responses.add("POST", f"{self.URL_ROOT}/api", body="not json")
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"status": "current"}),
+        )
+
+        summary = client.await_plabels()
+
+        self.assertEqual({"status": "current"}, summary)
+
+    @responses.activate
+    def test_upload_attributes(self):
+        """The attributes file is uploaded as its raw utf-8 bytes."""
+        responses.add(
+            "PUT",
+            f"{self.URL_ROOT}/datasets/abc123/attributes",
+            body=json.dumps({"status": "current"}),
+        )
+        contents = '{"n":1}\n[["café"]]\n'.encode("utf-8")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            attrs_file = os.path.join(tmpdir, "attrs.jsonl")
+            with open(attrs_file, "wb") as f:
+                f.write(contents)
+
+            summary = client.upload_attributes("abc123", attrs_file)
+
+        self.assertEqual({"status": "current"}, summary)
+        request = responses.calls[0].request
+        self.assertEqual(str(len(contents)), request.headers["Content-Length"])
+
+    @responses.activate
+    def test_config(self):
+        """The config is cached until it is changed through the client."""
+        self.addCleanup(client._invalidate_config)
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/config",
+            body=json.dumps({"remote": "https://hub"}),
+        )
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/config",
+            body=json.dumps({"remote": "https://other-hub"}),
+        )
+
+        self.assertEqual({"remote": "https://hub"}, client.config())
+        self.assertEqual({"remote": "https://hub"}, client.config())
+        self.assertEqual(1, len(responses.calls))
+
+        client.config_set("remote", "https://other-hub")
+        client.config()
+
+        self.assertEqual(3, len(responses.calls))
+
+    @responses.activate
+    def test_config_error_not_cached(self):
+        """An error response is returned but not cached."""
+        self.addCleanup(client._invalidate_config)
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/config",
+            body=json.dumps({"error_verb": "config", "error_msg": "not ready"}),
+        )
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/config",
+            body=json.dumps({"remote": "https://hub"}),
+        )
+
+        self.assertEqual("not ready", client.config()["error_msg"])
+        self.assertEqual({"remote": "https://hub"}, client.config())
+        self.assertEqual(2, len(responses.calls))
+
+    @mock.patch("watchful.client.await_port_opening")
+    @mock.patch("watchful.client.subprocess.Popen")
+    def test_ephemeral(self, popen, await_port_opening):
+        """The backend is started without a shell and its port awaited."""
+        self.addCleanup(client.external, port=client.PORT)
+        self.addCleanup(setattr, client, "_EPHEMERAL_PROC", None)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                client.ephemeral("9003")
+            finally:
+                os.chdir(cwd)
+
+        self.assertEqual(
+            ["watchful", "-p", "9003", "--no-persistence"],
+            popen.call_args.args[0],
+        )
+        self.assertIs(subprocess.DEVNULL, popen.call_args.kwargs["stdin"])
+        self.assertTrue(popen.call_args.kwargs["start_new_session"])
+        self.assertIs(popen.return_value, client._EPHEMERAL_PROC)
+        await_port_opening.assert_called_once_with(9003)
+        self.assertEqual("9003", client.PORT)
+
+    @responses.activate
+    def test_login(self):
+        """The credentials are sent as basic auth."""
+        self.addCleanup(setattr, client, "TOKEN", client.TOKEN)
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/remote",
+            body=json.dumps({"status": "current", "token": "abc123"}),
+        )
+
+        client.login("user@example.com", "pässword")
+
+        self.assertEqual("abc123", client.TOKEN)
+        self.assertEqual(
+            "Basic dXNlckBleGFtcGxlLmNvbTpww6Rzc3dvcmQ=",
+            responses.calls[0].request.headers["Authorization"],
+        )
+
+    @responses.activate
+    @mock.patch("watchful.client.uuid4")
+    def test_create_dataset_stream(self, uuid4):
+        """The csv dataset is streamed from the file object."""
+        uuid4.return_value = "7"
+        responses.add(
+            "POST", f"{self.URL_ROOT}/api/_stream/7/0/true", body="{}"
+        )
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api/_stream/7",
+            body=json.dumps({"id": "12"}),
+        )
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"datasets": ["12"]}),
+        )
+
+        dataset_id = client.create_dataset_stream(
+            io.BytesIO(b"a,b\n1,2\n"), ["a", "b"]
+        )
+
+        self.assertEqual("12", dataset_id)
+        self.assertEqual(
+            {"verb": "dataset_add", "id": "12", "columns": ["a", "b"]},
+            json.loads(responses.calls[2].request.body),
+        )
+
+    @responses.activate
+    def test_create_dataset_not_utf8(self):
+        """A non utf-8 dataset is only loaded when forced."""
+        self.assertRaises(
+            Warning,
+            client.create_dataset,
+            "a,b\n1,2\n".encode("utf-16"),
+            ["a", "b"],
+            force_load=False,
+        )
+        self.assertEqual(0, len(responses.calls))
+
+    @mock.patch("watchful.client._stream_dataset", return_value="12")
+    @mock.patch("watchful.client.is_utf8")
+    def test_create_dataset_forced(self, is_utf8, _stream_dataset):
+        """The encoding is not detected when loading is forced."""
+        dataset_id = client.create_dataset(b"a,b\n1,2\n", ["a", "b"])
+
+        self.assertEqual("12", dataset_id)
+        is_utf8.assert_not_called()
+
+    @responses.activate
+    def test_label_single(self):
+        """The plabels of the single row are returned."""
+        responses.add("POST", f"{self.URL_ROOT}/label", body="a,1,positive\r\n")
+
+        plabels = client.label_single(["a", "1"])
+
+        self.assertEqual(["a", "1", "positive"], plabels)
+        self.assertEqual(b"a,1\r\n", responses.calls[0].request.body)
+
+    @responses.activate
+    def test_label_batch_with_header(self):
+        """The prepended header is checked and dropped from the plabels."""
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/label",
+            body="letter,number,class\r\na,1,positive\r\nb,2,negative\r\n",
+        )
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps(
+                {
+                    "columns": [
+                        {"column_name": "letter"},
+                        {"column_name": "number"},
+                    ]
+                }
+            ),
+        )
+
+        plabels = client.label_batch([["a", "1"], ["b", "2"]])
+
+        self.assertEqual(
+            [["a", "1", "positive"], ["b", "2", "negative"]], plabels
+        )
+        self.assertEqual(2, len(responses.calls))
+
+    def test_candidate_dicts(self):
+        """The candidates of the summary are named with its field names."""
+        summary = {
+            "field_names": ["letter", "number"],
+            "candidates": [{"fields": ["a", "1"]}, {"fields": ["b", "2"]}],
+        }
+
+        candidates = client.candidate_dicts(summary)
+
+        self.assertEqual(
+            [
+                {"letter": "a", "number": "1"},
+                {"letter": "b", "number": "2"},
+            ],
+            candidates,
+        )
+
+    @responses.activate
+    def test_ignore_column_flag(self):
+        """The given columns are flagged in the negative sense."""
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps(
+                {
+                    "columns": [
+                        {"column_name": "a"},
+                        {"column_name": "b"},
+                        {"column_name": "c"},
+                    ]
+                }
+            ),
+        )
+        responses.add("POST", f"{self.URL_ROOT}/api", body="{}")
+
+        client.ignore_column_flag(["b"])
+
+        self.assertEqual(
+            {
+                "verb": "column_flag",
+                "flag": "inferenceable",
+                "columns": [True, False, True],
+            },
+            json.loads(responses.calls[1].request.body),
+        )
+
+    @responses.activate
+    def test_dump(self):
+        """All the candidates are returned, chunk by chunk."""
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps(
+                {"n_candidates": 3, "candidates": [["a", "1"], ["b", "2"]]}
+            ),
+        )
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"n_candidates": 3, "candidates": [["c", "3"]]}),
+        )
+
+        candidates = list(client.dump())
+
+        self.assertEqual([["a", "1"], ["b", "2"], ["c", "3"]], candidates)
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_dump_summary_hook_thread(self):
+        """The summary hook is called from the caller's thread for each chunk."""
+        self.addCleanup(client.register_summary_hook, None)
+        threads = []
+        client.register_summary_hook(
+            lambda _: threads.append(threading.get_ident())
+        )
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"n_candidates": 2, "candidates": [["a", "1"]]}),
+        )
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"n_candidates": 2, "candidates": [["b", "2"]]}),
+        )
+
+        candidates = list(client.dump())
+
+        self.assertEqual([["a", "1"], ["b", "2"]], candidates)
+        self.assertEqual([threading.get_ident()] * 2, threads)
+
+    @responses.activate
+    def test_dump_empty_chunk(self):
+        """Dumping stops at an empty chunk, even if candidates are missing."""
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"n_candidates": 3, "candidates": [["a", "1"]]}),
+        )
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps({"n_candidates": 3, "candidates": []}),
+        )
+
+        candidates = list(client.dump())
+
+        self.assertEqual([["a", "1"]], candidates)
+        self.assertEqual(2, len(responses.calls))
+
+    @responses.activate
+    def test_dump_dicts(self):
+        """The candidates are named with the field names of the first chunk."""
+        responses.add(
+            "POST",
+            f"{self.URL_ROOT}/api",
+            body=json.dumps(
+                {
+                    "n_candidates": 2,
+                    "field_names": ["letter", "number"],
+                    "candidates": [["a", "1"], ["b", "2"]],
+                }
+            ),
+        )
+
+        candidates = list(client.dump_dicts())
+
+        self.assertEqual(
+            [
+                {"letter": "a", "number": "1"},
+                {"letter": "b", "number": "2"},
+            ],
+            candidates,
+        )
+        self.assertEqual(1, len(responses.calls))
+
+    @responses.activate
+    def test_export_project_to_path(self):
+        """The project file is written as is."""
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/export_project",
+            body=b'{"hints": []}\n',
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out_file = os.path.join(tmpdir, "project.hints")
+            client.export_project_to_path(out_file)
+
+            with open(out_file, "rb") as f:
+                self.assertEqual(b'{"hints": []}\n', f.read())
+
+    @responses.activate
+    def test_export_dataset_to_path(self):
+        """The exported dataset is written as is."""
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/export_stream",
+            body='a,"b\nc"\n1,2\n"3\n4",5\n',
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out_file = os.path.join(tmpdir, "dataset.csv")
+            client.export_dataset_to_path(out_file, ["a", "b\nc"])
+
+            with open(out_file, encoding="utf-8", newline="") as f:
+                self.assertEqual('a,"b\nc"\n1,2\n"3\n4",5\n', f.read())
+
+    @responses.activate
+    def test_export_dataset_to_path_fewer_fields(self):
+        """Only the expected columns of the exported dataset are written."""
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/export_stream",
+            body="a,b,Hints\n1,2,x\n3,4,y\n",
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out_file = os.path.join(tmpdir, "dataset.csv")
+            client.export_dataset_to_path(out_file, ["a", "b"])
+
+            with open(out_file, encoding="utf-8", newline="") as f:
+                self.assertEqual("a,b\r\n1,2\r\n3,4\r\n", f.read())
+
+    @responses.activate
+    def test_export_dataset_to_path_fewer_fields_quoted(self):
+        """Quoted fields, even spanning lines, are projected like csv does."""
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/export_stream",
+            body='a,b,Hints\n"1,2","x\ny",z\n,,\n"",3,w\n',
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out_file = os.path.join(tmpdir, "dataset.csv")
+            client.export_dataset_to_path(out_file, ["a", "b"])
+
+            with open(out_file, encoding="utf-8", newline="") as f:
+                self.assertEqual('a,b\r\n"1,2","x\ny"\r\n,\r\n,3\r\n', f.read())
+
+    @responses.activate
+    def test_export_dataset_to_path_stray_quotes(self):
+        """A quote inside an unquoted field is kept as part of the field."""
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/export_stream",
+            body='a,b",Hints\n1,5" screen,x\n2,3,y\n',
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out_file = os.path.join(tmpdir, "dataset.csv")
+            client.export_dataset_to_path(out_file, ["a", 'b"'])
+
+            with open(out_file, encoding="utf-8", newline="") as f:
+                self.assertEqual(
+                    'a,"b"""\r\n1,"5"" screen"\r\n2,3\r\n', f.read()
+                )
+
+    @responses.activate
+    def test_export_dataset_to_path_mismatched_fields(self):
+        """The expected columns must match the exported dataset's columns."""
+        responses.add(
+            "GET",
+            f"{self.URL_ROOT}/export_stream",
+            body="a,b\n1,2\n",
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            out_file = os.path.join(tmpdir, "dataset.csv")
+            self.assertRaises(
+                ValueError, client.export_dataset_to_path, out_file, ["b"]
+            )
+
     def test_get_project_id(self):
         summary = {"project_id": "abc123"}
 
@@ -145,6 +684,13 @@ class TestClient(unittest.TestCase):
             client.WatchfulAppInstanceError, client.get_project_id, summary
         )
 
+    def test_get_project_id_null(self):
+        summary = {"project_id": None}
+
+        self.assertRaises(
+            client.WatchfulAppInstanceError, client.get_project_id, summary
+        )
+
     def test_get_dataset_id(self):
         summary = {
             "datasets": ["abc123"],
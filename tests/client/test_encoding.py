@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 
 from watchful import client
@@ -17,3 +19,25 @@ class TestEncoding(unittest.TestCase):
     def test_utf16(self) -> None:
         utf16_text = "A\nabc\nde𐐷".encode("utf-16")
         assert not client.is_utf8(utf16_text)
+
+    def test_utf8_large(self) -> None:
+        utf8_text = ("A\nabc\ndéf\n" * 10000).encode("utf-8")
+        assert client.is_utf8(utf8_text)
+
+    def test_utf8_filepath(self) -> None:
+        utf8_text = ("A\nabc\ndéf\n" * 10000).encode("utf-8")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "dataset.csv")
+            with open(filepath, "wb") as f:
+                f.write(utf8_text)
+
+            assert client.is_utf8(filepath=filepath)
+
+    def test_utf16_filepath(self) -> None:
+        utf16_text = "A\nabc\nde𐐷".encode("utf-16")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, "dataset.csv")
+            with open(filepath, "wb") as f:
+                f.write(utf16_text)
+
+            assert not client.is_utf8(filepath=filepath)
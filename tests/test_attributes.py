@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 from unittest import mock
 
@@ -102,42 +104,127 @@ class TestContigSpans(unittest.TestCase):
         self.assertEqual([0, 1, 1, 1, 1, 1], value)
 
 
+class TestContigSpansBase64Str(unittest.TestCase):
+    def test_contig_spans_base64str(self):
+        """Spans are encoded the same as base64str(contig_spans(spans))"""
+        spans = [(0, 1), (2, 3), (4, 5), (100, 2291947)]
+
+        value = attributes.contig_spans_base64str(spans)
+
+        self.assertEqual(
+            attributes.base64str(attributes.contig_spans(spans)), value
+        )
+        self.assertEqual("#011111,1O,8_R7", value)
+
+
+class TestAdjustSpanOffsetsFromCharToByte(unittest.TestCase):
+    def test_adjust_span_offsets_from_char_to_byte(self):
+        """Character offsets are moved past multi-byte characters"""
+        enriched_cell = [([(0, 1), (2, 5)], {}), ([(0, 7)], {}, "SENTS")]
+
+        attributes.adjust_span_offsets_from_char_to_byte(
+            "é 😀ab!c", enriched_cell
+        )
+
+        self.assertEqual(
+            [([(0, 2), (3, 9)], {}), ([(0, 11)], {}, "SENTS")],
+            enriched_cell,
+        )
+
+
+class TestCountRows(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "dataset.csv")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, contents):
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write(contents)
+
+    def test_count_rows(self):
+        """The header is not counted as a row"""
+        self._write("a,b\n1,2\n3,4\n")
+
+        self.assertEqual(2, attributes.count_rows(self.path))
+
+    def test_count_rows_no_trailing_newline(self):
+        """The last row is counted without a trailing newline"""
+        self._write("a,b\r\n1,2\r\n3,4")
+
+        self.assertEqual(2, attributes.count_rows(self.path))
+
+    def test_count_rows_embedded_newline(self):
+        """Newlines embedded in quoted cells do not start new rows"""
+        self._write('a,b\n"1\n2",3\n4,5\n')
+
+        self.assertEqual(2, attributes.count_rows(self.path))
+
+    def test_count_rows_lone_cr(self):
+        """Rows ending with a lone carriage return are counted"""
+        self._write("a,b\r1,2\r3,4\r")
+
+        self.assertEqual(2, attributes.count_rows(self.path))
+
+    def test_count_rows_header_only(self):
+        """A dataset with only a header has no rows"""
+        self._write("a,b\n")
+
+        self.assertIsNone(attributes.count_rows(self.path))
+
+    def test_count_rows_header_only_quoted(self):
+        """A dataset with only a quoted header has no rows"""
+        self._write('"a",b\n')
+
+        self.assertIsNone(attributes.count_rows(self.path))
+
+
+class TestGetVarsForEnrichRowWithAttributeData(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "attrs.csv")
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write("a,b,c,d\n1,2,3,4\n")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _get_attr_row(self, attr_names):
+        (
+            get_attr_row,
+            attr_name_list,
+            attr_reader,
+        ) = attributes.get_vars_for_enrich_row_with_attribute_data(
+            attr_names, self.path
+        )
+        return attr_name_list, get_attr_row(next(attr_reader))
+
+    def test_contiguous_attr_names(self):
+        """Contiguous attribute names are picked in order"""
+        self.assertEqual((["b", "c"], ["2", "3"]), self._get_attr_row("b,c"))
+
+    def test_non_contiguous_attr_names(self):
+        """Non-contiguous attribute names are picked in the given order"""
+        self.assertEqual((["d", "a"], ["4", "1"]), self._get_attr_row("d,a"))
+
+    def test_unknown_attr_name(self):
+        """An unknown attribute name is an error"""
+        self.assertRaises(ValueError, self._get_attr_row, "a,e")
+
+
 class TestWriter(unittest.TestCase):
     def test_writer(self):
         """A writer factory produces a writer object to write attribute files"""
         write_mock = mock.Mock()
         expected_calls = [
-            mock.call("{"),
-            mock.call('"version"'),
-            mock.call(":"),
-            mock.call('"0.3"'),
-            mock.call(","),
-            mock.call('"rows"'),
-            mock.call(":"),
-            mock.call("2"),
-            mock.call(","),
-            mock.call('"cols"'),
-            mock.call(":"),
-            mock.call("2"),
-            mock.call("}"),
-            mock.call("\n"),
-            mock.call('["@"'),
-            mock.call(',"key"'),
-            mock.call("]"),
-            mock.call("\n"),
-            mock.call('["$"'),
-            mock.call(',"key"'),
-            mock.call(',"1"'),
-            mock.call("]"),
-            mock.call("\n"),
-            mock.call('["#110101"'),
-            mock.call(","),
-            mock.call('["an_name"'),
-            mock.call(",1"),
-            mock.call(',"#110"'),
-            mock.call("]"),
-            mock.call("]"),
-            mock.call("\n"),
+            mock.call('{"version":"0.3","rows":2,"cols":2}\n'),
+            mock.call(
+                '["@","key"]\n'
+                '["$","key","1"]\n'
+                '["#110101",["an_name",1,"#110"]]\n'
+            ),
         ]
 
         writer = attributes.writer(write_mock, 2, 2)
@@ -157,7 +244,7 @@ class TestWriter(unittest.TestCase):
             ]
         )
 
-        self.assertEquals(
+        self.assertEqual(
             expected_calls,
             write_mock.write.mock_calls,
         )